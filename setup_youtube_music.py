@@ -4,84 +4,168 @@ Extract YouTube Music browser authentication from Chrome's "Copy as cURL" output
 Reads from curl.txt file.
 """
 
+import argparse
 import json
+import os
 import re
+import shlex
 import sys
 from pathlib import Path
+from typing import Iterator
+
+# A backslash at the end of a line continues the shell command
+LINE_CONTINUATION = re.compile(r"\\\r?\n")
+
+# Shell words, so $'...' is only recognised outside other quotes. Chrome's
+# "Copy as cURL" uses ANSI-C $'...' quoting for values containing ' or !
+SHELL_QUOTING = re.compile(
+    r"""'[^']*'|"(?:[^"\\]|\\.)*"|\\.|\$'((?:[^'\\]|\\.)*)'""", re.DOTALL
+)
+
+# Backslash escapes inside $'...'
+ANSI_C_ESCAPE = re.compile(r"\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{1,2}|.)", re.DOTALL)
+ANSI_C_CHARS = {
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "\\": "\\",
+    "'": "'",
+    '"': '"',
+}
+
+
+def _decode_ansi_c(match: re.Match) -> str:
+    """Decode one backslash escape from a $'...' word."""
+    escape = match.group(1)
+    if escape[0] in "ux" and len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return ANSI_C_CHARS.get(escape, match.group(0))
+
+
+def _requote(match: re.Match) -> str:
+    """Rewrite a $'...' word as a plain shell word that shlex understands."""
+    if match.group(1) is None:
+        return match.group(0)
+    return shlex.quote(ANSI_C_ESCAPE.sub(_decode_ansi_c, match.group(1)))
+
+
+def _split_long_options(tokens: list) -> Iterator[str]:
+    """Yield --header=value and --cookie=value as an option and its argument."""
+    for token in tokens:
+        option, sep, argument = token.partition("=")
+        if sep and option in ("--header", "--cookie"):
+            yield option
+            yield argument
+        else:
+            yield token
 
 
 def extract_cookies_and_headers(text: str) -> dict:
     """
     Extract headers and cookies from any cURL format.
     """
-    # Join all lines and clean up backslashes
-    text = " ".join(text.split("\\\n"))
-    text = " ".join(text.split("\\"))
+    # Drop shell line continuations, then split into arguments like a shell would
+    text = LINE_CONTINUATION.sub(" ", text)
+    text = SHELL_QUOTING.sub(_requote, text)
+    tokens = _split_long_options(shlex.split(text))
 
     result = {}
 
-    # Extract all -H headers
-    header_pattern = r"-H\s+['\"]([^'\"]+)['\"]"
-    for match in re.finditer(header_pattern, text):
-        header_line = match.group(1)
-        if ":" in header_line:
-            key, value = header_line.split(":", 1)
-            result[key.strip().lower()] = value.strip()
-
-    # Extract cookies from -b flag
-    cookie_pattern = r"-b\s+['\"]([^'\"]+)['\"]"
-    cookie_match = re.search(cookie_pattern, text)
-    if cookie_match:
-        result["cookie"] = cookie_match.group(1).strip()
+    for token in tokens:
+        # -H 'name: value' headers
+        if token in ("-H", "--header"):
+            key, sep, value = next(tokens, "").partition(":")
+            if sep:
+                result[key.strip().lower()] = value.strip()
+        # -b 'cookies' (cURL's cookie flag)
+        elif token in ("-b", "--cookie"):
+            result["cookie"] = next(tokens, "").strip()
 
     return result
 
 
-def main():
+# Headers written to browser.json, with defaults for any the cURL omitted
+BROWSER_HEADERS = (
+    (
+        "User-Agent",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    ),
+    ("Accept", "*/*"),
+    ("Accept-Language", "en-US,en;q=0.9"),
+    ("Content-Type", "application/json"),
+    ("X-Goog-AuthUser", "0"),
+    ("x-origin", "https://music.youtube.com"),
+)
+
+# Cookies that an authenticated YouTube Music session always carries
+REQUIRED_COOKIES = frozenset({"__Secure-3PAPISID", "__Secure-3PSID"})
+
+
+def has_auth_cookies(cookie: str) -> bool:
+    """
+    Check locally whether a Cookie header looks like a logged-in session.
+    """
+    names = {part.split("=", 1)[0].strip() for part in cookie.split(";")}
+    return REQUIRED_COOKIES <= names
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--curl-file",
+        type=Path,
+        default=Path("curl.txt"),
+        help="file containing the copied cURL command (default: curl.txt)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="test the saved credentials against YouTube Music",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
     print("=" * 60)
     print("🌐 YouTube Music Auth from Chrome DevTools")
     print("=" * 60)
 
-    # Read from curl.txt
-    curl_file = Path("curl.txt")
+    curl_file = args.curl_file
 
     if not curl_file.exists():
-        print("\n❌ curl.txt not found!")
+        print(f"\n❌ {curl_file} not found!")
         print("\nInstructions:")
         print("1. Copy cURL from Chrome DevTools (Copy → Copy as cURL)")
-        print("2. Save it to curl.txt in this directory")
+        print(f"2. Save it to {curl_file}")
         print("3. Run this script again")
         return 1
 
-    with open(curl_file, "r") as f:
-        input_text = f.read()
+    input_text = curl_file.read_text()
 
-    print(f"\n✅ Read {len(input_text)} bytes from curl.txt")
+    print(f"\n✅ Read {len(input_text)} bytes from {curl_file}")
 
     # Extract headers and cookies
-    data = extract_cookies_and_headers(input_text)
+    try:
+        data = extract_cookies_and_headers(input_text)
+    except ValueError as e:
+        print(f"\n❌ Could not parse the cURL command: {e}")
+        return 1
 
     if not data.get("cookie"):
         print("\n❌ No cookies found in the cURL command")
         print(f"   Found {len(data)} headers but no cookies")
-        print("\nMake sure the curl.txt contains the full cURL command from Chrome")
+        print(f"\nMake sure {curl_file} contains the full cURL command from Chrome")
         return 1
 
     print(f"✅ Found {len(data)} headers including cookies")
 
     # Create browser.json
     browser_json = {
-        "User-Agent": data.get(
-            "user-agent",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        ),
-        "Accept": data.get("accept", "*/*"),
-        "Accept-Language": data.get("accept-language", "en-US,en;q=0.9"),
-        "Content-Type": data.get("content-type", "application/json"),
-        "X-Goog-AuthUser": data.get("x-goog-authuser", "0"),
-        "x-origin": data.get("x-origin", "https://music.youtube.com"),
-        "Cookie": data["cookie"],
+        name: data.get(name.lower(), default) for name, default in BROWSER_HEADERS
     }
+    browser_json["Cookie"] = data["cookie"]
 
     # Add authorization if present
     if "authorization" in data:
@@ -92,12 +176,23 @@ def main():
     config_dir.mkdir(parents=True, exist_ok=True)
     config_path = config_dir / "browser.json"
 
-    with open(config_path, "w") as f:
-        json.dump(browser_json, f, indent=2)
+    # Write to a temporary file first so a partial write never replaces it
+    tmp_path = config_path.with_name(config_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(browser_json, indent=2))
+    os.replace(tmp_path, config_path)
 
     print(f"💾 Saved to {config_path}")
 
-    # Test it
+    if has_auth_cookies(browser_json["Cookie"]):
+        print("✅ Found YouTube Music session cookies")
+    else:
+        print("\n⚠️  Session cookies look incomplete")
+
+    # Only hit the network when asked to
+    if not args.verify:
+        print("\nRun with --verify to test the credentials against YouTube Music")
+        return 0
+
     print("\n🔍 Testing with ytmusicapi...")
     try:
         from ytmusicapi import YTMusic
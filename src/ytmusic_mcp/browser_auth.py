@@ -1,9 +1,175 @@
 """Browser authentication support for YouTube Music."""
 
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-from ytmusicapi import YTMusic
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .search_cache import SearchCache
+
+if TYPE_CHECKING:
+    from ytmusicapi import YTMusic
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of concurrent search requests across all tool calls
+SEARCH_WORKERS = 8
+
+# Shared by every manager so threads are reused between tool calls
+_executor = ThreadPoolExecutor(
+    max_workers=SEARCH_WORKERS, thread_name_prefix="ytmusic-search"
+)
+
+# Seconds a successful validate_auth result is reused for
+VALIDATION_TTL = 60
+
+# Number of distinct queries whose search results each manager keeps
+SEARCH_CACHE_SIZE = 512
+
+# Seconds a search result is reused for, in memory and on disk
+SEARCH_CACHE_TTL = 24 * 60 * 60
+
+# Maximum number of videos sent in one add_playlist_items request
+ADD_BATCH_SIZE = 100
+
+# Times a request is retried after YouTube Music answers 429 Too Many Requests
+RATE_LIMIT_RETRIES = 3
+
+# Longest Retry-After wait honoured, in seconds, so a rate limit can't stall
+# a search worker (and the tool call waiting on it) for hours
+RATE_LIMIT_MAX_WAIT = 10
+
+# Search parameters shared by playlist creation and detailed search
+_SONG_SEARCH = {"filter": "songs", "limit": 5}
+
+# Shared read-only defaults for missing or null fields in search results
+_EMPTY: tuple = ()
+_EMPTY_DICT: Dict[str, Any] = {}
+
+# Title words that mark a track as something other than the original recording
+_REMIX_WORDS = frozenset({"remix", "rmx", "rework", "edit"})
+_FLAG_WORDS = _REMIX_WORDS | {"live", "cover"}
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _normalize_query(query: str) -> str:
+    """Normalize a search query so trivially different spellings match."""
+    return " ".join(query.lower().split())
+
+
+def _unique_queries(queries: list[str]) -> Dict[str, str]:
+    """Map each normalized query to the first spelling of it, in order."""
+    unique: Dict[str, str] = {}
+    for query in queries:
+        unique.setdefault(_normalize_query(query), query)
+    return unique
+
+
+def _title_flags(title: str) -> frozenset:
+    """Return the remix/live/cover marker words that appear in a title."""
+    return _FLAG_WORDS.intersection(_WORD_RE.findall(title.lower()))
+
+
+def _score(result: Dict[str, Any], query_lower: str) -> int:
+    """Score a search result against the lowercased query; higher is better."""
+    score = 0
+    title = result.get("title", "")
+    flags = _title_flags(title)
+
+    # Exact title match
+    if query_lower in title.lower():
+        score += 10
+
+    # Penalize remixes
+    if not flags.isdisjoint(_REMIX_WORDS):
+        score -= 5
+
+    # Penalize live versions
+    if "live" in flags:
+        score -= 3
+
+    # Penalize covers
+    if "cover" in flags:
+        score -= 4
+
+    # Prefer official/topic channels
+    artists = result.get("artists") or _EMPTY
+    if artists and any("topic" in a.get("name", "").lower() for a in artists):
+        score += 2
+
+    # Prefer explicit matches if in query
+    if "explicit" in query_lower and result.get("isExplicit"):
+        score += 1
+
+    return score
+
+
+@lru_cache(maxsize=1)
+def _ytmusic_class() -> type["YTMusic"]:
+    """Import ytmusicapi on first use; it is slow to import and rarely needed."""
+    from ytmusicapi import YTMusic
+
+    return YTMusic
+
+
+class _RateLimitRetry(Retry):
+    """Retry that waits at most RATE_LIMIT_MAX_WAIT seconds for Retry-After."""
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, RATE_LIMIT_MAX_WAIT)
+
+
+# Retry rate-limited requests, honouring Retry-After. ytmusicapi sends POSTs,
+# which are safe to resend after a 429 since the server rejected them unread.
+# Read errors are not retried, as the request may already have been applied.
+_RATE_LIMIT_RETRY = _RateLimitRetry(
+    total=RATE_LIMIT_RETRIES,
+    read=0,
+    status_forcelist=(429,),
+    allowed_methods=frozenset({"GET", "POST"}),
+    backoff_factor=1,
+    backoff_jitter=0.5,
+    raise_on_status=False,
+)
+
+
+def _create_session() -> requests.Session:
+    """Create a pooled HTTP session to share across YTMusic requests."""
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_RATE_LIMIT_RETRY),
+    )
+    # ytmusicapi only sets its 30s default timeout on sessions it creates itself
+    session.request = partial(session.request, timeout=30)
+    return session
+
+
+@lru_cache(maxsize=1)
+def _resolve_browser_json_path() -> Path:
+    """Find browser.json, defaulting to the user config directory."""
+    # Look in multiple locations
+    possible_paths = (
+        Path.home() / ".config" / "ytmusic-mcp" / "browser.json",  # User config dir
+        Path.home() / ".ytmusic" / "browser.json",  # Home directory
+        Path("browser.json"),  # Current directory
+    )
+    for path in possible_paths:
+        if path.exists():
+            return path
+    return possible_paths[0]
 
 
 class BrowserAuthManager:
@@ -11,65 +177,99 @@ class BrowserAuthManager:
 
     def __init__(self, browser_json_path: str = None):
         if browser_json_path is None:
-            # Look in multiple locations
-            possible_paths = [
-                Path.home()
-                / ".config"
-                / "ytmusic-mcp"
-                / "browser.json",  # User config dir
-                Path.home() / ".ytmusic" / "browser.json",  # Home directory
-                Path("browser.json"),  # Current directory
-            ]
-            for path in possible_paths:
-                if path.exists():
-                    self.browser_json_path = path
-                    break
-            else:
-                # Default to user config directory
-                self.browser_json_path = (
-                    Path.home() / ".config" / "ytmusic-mcp" / "browser.json"
-                )
+            self.browser_json_path = _resolve_browser_json_path()
         else:
             self.browser_json_path = Path(browser_json_path)
-        self._ytmusic: Optional[YTMusic] = None
+        self._session = _create_session()
+        self._ytmusic: Optional["YTMusic"] = None
+        self._ytmusic_mtime: Optional[int] = None
+        self._ytmusic_lock = threading.Lock()
+        self._playlist_manager: Optional[BrowserPlaylistManager] = None
+        self._disk_cache = SearchCache(ttl=SEARCH_CACHE_TTL)
+        self._validation: Dict[str, Any] = {}
+        self._validated_mtime: Optional[int] = None
+        self._validated_until = 0.0
 
     def is_authenticated(self) -> bool:
         """Check if browser authentication is available."""
         return self.browser_json_path.exists()
 
-    def get_ytmusic(self) -> YTMusic:
-        """Get YTMusic instance with browser authentication."""
-        if not self.is_authenticated():
-            raise RuntimeError(f"Browser auth not found at {self.browser_json_path}")
+    def get_ytmusic(self) -> "YTMusic":
+        """
+        Get YTMusic instance with browser authentication.
 
-        if self._ytmusic is None:
-            self._ytmusic = YTMusic(str(self.browser_json_path))
+        The client is cached and only rebuilt when browser.json changes.
+        """
+        return self._current_ytmusic()[0]
+
+    def _current_ytmusic(self) -> tuple["YTMusic", int]:
+        """Return the YTMusic client and the browser.json mtime it was built from."""
+        try:
+            mtime = self.browser_json_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise RuntimeError(
+                f"Browser auth not found at {self.browser_json_path}"
+            ) from None
+
+        with self._ytmusic_lock:
+            if self._ytmusic is None or mtime != self._ytmusic_mtime:
+                self._ytmusic = _ytmusic_class()(
+                    str(self.browser_json_path), requests_session=self._session
+                )
+                self._ytmusic_mtime = mtime
+            return self._ytmusic, self._ytmusic_mtime
 
-        return self._ytmusic
+    def get_playlist_manager(self) -> "BrowserPlaylistManager":
+        """
+        Get a BrowserPlaylistManager for the current YTMusic client.
 
+        The manager, and with it its search cache, is shared between calls
+        until browser.json changes.
+        """
+        ytmusic = self.get_ytmusic()
+        if (
+            self._playlist_manager is None
+            or self._playlist_manager.ytmusic is not ytmusic
+        ):
+            self._playlist_manager = BrowserPlaylistManager(ytmusic, self._disk_cache)
+        return self._playlist_manager
 
     def validate_auth(self) -> Dict[str, Any]:
         """
         Validate browser authentication by making a test request.
 
+        A successful result is reused for VALIDATION_TTL seconds, or until
+        browser.json changes.
+
         Returns:
             Dictionary with validation results
         """
         try:
-            ytmusic = self.get_ytmusic()
-
-            # Try to get library playlists as a test
-            playlists = ytmusic.get_library_playlists(limit=1)
-
-            # Try to search as well
-            search_results = ytmusic.search("test", filter="songs", limit=1)
-
-            return {
+            # Keep the mtime of the probed client; browser.json may change meanwhile
+            ytmusic, mtime = self._current_ytmusic()
+
+            # Reuse a recent success for the same browser.json
+            if (
+                self._validated_mtime == mtime
+                and time.monotonic() < self._validated_until
+            ):
+                return self._validation
+
+            # Probe the library and search at the same time
+            library = _executor.submit(ytmusic.get_library_playlists, limit=1)
+            search = _executor.submit(ytmusic.search, "test", filter="songs", limit=1)
+            library.result()
+            search_results = search.result()
+
+            self._validation = {
                 "valid": True,
                 "can_access_library": True,
                 "can_search": len(search_results) > 0,
                 "message": "Browser authentication is working",
             }
+            self._validated_mtime = mtime
+            self._validated_until = time.monotonic() + VALIDATION_TTL
+            return self._validation
         except Exception as e:
             return {
                 "valid": False,
@@ -81,8 +281,35 @@ class BrowserAuthManager:
 class BrowserPlaylistManager:
     """Create playlists using browser authentication (no API quotas)."""
 
-    def __init__(self, ytmusic: YTMusic):
+    def __init__(self, ytmusic: "YTMusic", disk_cache: Optional[SearchCache] = None):
         self.ytmusic = ytmusic
+        self.disk_cache = disk_cache
+        # Normalized query -> (monotonic expiry time, search results)
+        self._memory_cache: OrderedDict[str, tuple[float, list]] = OrderedDict()
+        self._memory_cache_lock = threading.Lock()
+
+    def _search(self, query: str) -> list:
+        """Search for songs, reusing recent results from memory or disk."""
+        key = _normalize_query(query)
+        now = time.monotonic()
+        with self._memory_cache_lock:
+            cached = self._memory_cache.get(key)
+            if cached is not None and cached[0] > now:
+                self._memory_cache.move_to_end(key)
+                return cached[1]
+
+        results = self.disk_cache.get(key) if self.disk_cache is not None else None
+        if results is None:
+            results = self.ytmusic.search(query, **_SONG_SEARCH)
+            if self.disk_cache is not None:
+                self.disk_cache.set(key, results)
+
+        with self._memory_cache_lock:
+            self._memory_cache[key] = (now + SEARCH_CACHE_TTL, results)
+            self._memory_cache.move_to_end(key)
+            if len(self._memory_cache) > SEARCH_CACHE_SIZE:
+                self._memory_cache.popitem(last=False)
+        return results
 
     def search_and_create_playlist(
         self, title: str, description: str, queries: list[str], privacy: str = "PRIVATE"
@@ -110,66 +337,97 @@ class BrowserPlaylistManager:
         if isinstance(playlist_id, dict) and "error" in playlist_id:
             return playlist_id
 
-        # Search and add tracks
-        results = []
-        video_ids = []
-
-        for query in queries:
-            try:
-                # Search with more results for better selection
-                search_results = self.ytmusic.search(query, filter="songs", limit=5)
-
-                if search_results:
-                    # Select best match (prefer non-remix, non-live)
-                    best_match = self._select_best_match(search_results, query)
-
-                    if best_match:
-                        video_ids.append(best_match["videoId"])
-                        results.append(
-                            {
-                                "query": query,
-                                "found": True,
-                                "title": best_match.get("title"),
-                                "artists": ", ".join(
-                                    a["name"] for a in best_match.get("artists", [])
-                                ),
-                                "album": best_match.get("album", {}).get("name"),
-                                "duration": best_match.get("duration"),
-                                "videoId": best_match["videoId"],
-                            }
-                        )
-                    else:
-                        results.append(
-                            {
-                                "query": query,
-                                "found": False,
-                                "reason": "No suitable match found",
-                            }
-                        )
-                else:
-                    results.append(
-                        {"query": query, "found": False, "reason": "No search results"}
-                    )
-            except Exception as e:
-                results.append({"query": query, "found": False, "error": str(e)})
+        # Search each distinct query once, concurrently, then map results back
+        unique_queries = _unique_queries(queries)
+        matches = dict(
+            zip(
+                unique_queries, _executor.map(self._find_track, unique_queries.values())
+            )
+        )
+        results = [
+            dict(matches[_normalize_query(query)], query=query) for query in queries
+        ]
+        # Different queries can resolve to the same video; add it only once
+        video_ids = list(
+            dict.fromkeys(
+                match["videoId"] for match in matches.values() if match["found"]
+            )
+        )
 
-        # Add tracks to playlist
-        if video_ids:
+        # Add tracks in batches, in order, so one failure doesn't lose the rest
+        tracks_added = 0
+        failed_batches = []
+        for start in range(0, len(video_ids), ADD_BATCH_SIZE):
+            batch = video_ids[start : start + ADD_BATCH_SIZE]
             try:
-                self.ytmusic.add_playlist_items(playlist_id, video_ids)
+                response = self.ytmusic.add_playlist_items(playlist_id, batch)
             except Exception as e:
-                # Log error but continue
-                print(f"Warning: Error adding some tracks: {e}")
+                error = str(e)
+            else:
+                # A rejected batch comes back as a response, not an exception
+                status = (
+                    response.get("status", "") if isinstance(response, dict) else ""
+                )
+                if "SUCCEEDED" in status:
+                    tracks_added += len(batch)
+                    continue
+                error = f"Add failed with status {status or 'unknown'}"
+
+            # Log error but continue
+            logger.warning("Error adding tracks to playlist %s: %s", playlist_id, error)
+            failed_batches.append({"videoIds": batch, "error": error})
+
+        # Flag each found track with whether it actually made it into the playlist
+        failed_ids = {
+            video_id for failed in failed_batches for video_id in failed["videoIds"]
+        }
+        for result in results:
+            if result["found"]:
+                result["added"] = result["videoId"] not in failed_ids
 
         return {
             "playlist_id": playlist_id,
             "playlist_url": f"https://music.youtube.com/playlist?list={playlist_id}",
             "youtube_url": f"https://www.youtube.com/playlist?list={playlist_id}",
-            "tracks_added": len(video_ids),
+            "tracks_added": tracks_added,
             "tracks_total": len(queries),
+            "failed_batches": failed_batches,
             "details": results,
         }
 
+    def _find_track(self, query: str) -> Dict[str, Any]:
+        """Search for a single query and describe its best match."""
+        try:
+            # Search with more results for better selection
+            search_results = self._search(query)
+
+            if not search_results:
+                return {"query": query, "found": False, "reason": "No search results"}
+
+            # Select best match (prefer non-remix, non-live)
+            best_match = self._select_best_match(search_results, query)
+
+            if not best_match:
+                return {
+                    "query": query,
+                    "found": False,
+                    "reason": "No suitable match found",
+                }
+
+            return {
+                "query": query,
+                "found": True,
+                "title": best_match.get("title"),
+                "artists": ", ".join(
+                    a["name"] for a in (best_match.get("artists") or _EMPTY)
+                ),
+                "album": (best_match.get("album") or _EMPTY_DICT).get("name"),
+                "duration": best_match.get("duration"),
+                "videoId": best_match["videoId"],
+            }
+        except Exception as e:
+            return {"query": query, "found": False, "error": str(e)}
+
     def _select_best_match(self, search_results: list, query: str) -> Optional[Dict]:
         """
         Select the best match from search results.
@@ -184,43 +442,7 @@ class BrowserPlaylistManager:
             return None
 
         query_lower = query.lower()
-
-        # Score each result
-        scored_results = []
-        for result in search_results:
-            score = 0
-            title_lower = result.get("title", "").lower()
-
-            # Exact title match
-            if query_lower in title_lower:
-                score += 10
-
-            # Penalize remixes
-            if any(word in title_lower for word in ["remix", "rmx", "rework", "edit"]):
-                score -= 5
-
-            # Penalize live versions
-            if "live" in title_lower:
-                score -= 3
-
-            # Penalize covers
-            if "cover" in title_lower:
-                score -= 4
-
-            # Prefer official/topic channels
-            artists = result.get("artists", [])
-            if artists and any("topic" in a.get("name", "").lower() for a in artists):
-                score += 2
-
-            # Prefer explicit matches if in query
-            if "explicit" in query_lower and result.get("isExplicit"):
-                score += 1
-
-            scored_results.append((score, result))
-
-        # Sort by score and return best match
-        scored_results.sort(key=lambda x: x[0], reverse=True)
-        return scored_results[0][1] if scored_results else None
+        return max(search_results, key=lambda result: _score(result, query_lower))
 
     def search_tracks_detailed(self, queries: list[str]) -> Dict[str, list]:
         """
@@ -232,35 +454,42 @@ class BrowserPlaylistManager:
         Returns:
             Dictionary mapping query to list of detailed results
         """
-        results = {}
+        # Search each distinct query once, concurrently; map() keeps query order
+        unique_queries = _unique_queries(queries)
+        matches = dict(
+            zip(
+                unique_queries,
+                _executor.map(self._search_detailed, unique_queries.values()),
+            )
+        )
+        return {query: matches[_normalize_query(query)] for query in queries}
 
-        for query in queries:
-            try:
-                search_results = self.ytmusic.search(query, filter="songs", limit=5)
-
-                detailed_results = []
-                for item in search_results:
-                    detailed_results.append(
-                        {
-                            "videoId": item.get("videoId"),
-                            "title": item.get("title"),
-                            "artists": [a["name"] for a in item.get("artists", [])],
-                            "album": item.get("album", {}).get("name"),
-                            "duration": item.get("duration"),
-                            "isExplicit": item.get("isExplicit", False),
-                            "thumbnails": item.get("thumbnails", []),
-                            # Detect remix/live/cover
-                            "isRemix": any(
-                                word in item.get("title", "").lower()
-                                for word in ["remix", "rmx", "rework", "edit"]
-                            ),
-                            "isLive": "live" in item.get("title", "").lower(),
-                            "isCover": "cover" in item.get("title", "").lower(),
-                        }
-                    )
-
-                results[query] = detailed_results
-            except Exception as e:
-                results[query] = {"error": str(e)}
+    def _search_detailed(self, query: str) -> Any:
+        """Search for a single query and describe every result."""
+        try:
+            search_results = self._search(query)
+
+            detailed_results = []
+            for item in search_results:
+                flags = _title_flags(item.get("title", ""))
+                # Thumbnails are listed smallest first; one URL is enough
+                thumbnails = item.get("thumbnails")
+                detailed_results.append(
+                    {
+                        "videoId": item.get("videoId"),
+                        "title": item.get("title"),
+                        "artists": [a["name"] for a in (item.get("artists") or _EMPTY)],
+                        "album": (item.get("album") or _EMPTY_DICT).get("name"),
+                        "duration": item.get("duration"),
+                        "isExplicit": item.get("isExplicit", False),
+                        "thumbnail": thumbnails[-1].get("url") if thumbnails else None,
+                        # Detect remix/live/cover
+                        "isRemix": not flags.isdisjoint(_REMIX_WORDS),
+                        "isLive": "live" in flags,
+                        "isCover": "cover" in flags,
+                    }
+                )
 
-        return results
+            return detailed_results
+        except Exception as e:
+            return {"error": str(e)}
@@ -0,0 +1,76 @@
+"""On-disk cache of YouTube Music search results."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default location of the cache database
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "ytmusic-mcp" / "search.db"
+
+# Seconds a cached search result stays valid
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class SearchCache:
+    """Persist search results in SQLite so they survive server restarts."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl: int = DEFAULT_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache"
+                " (query TEXT PRIMARY KEY, created REAL, results TEXT)"
+            )
+            # Drop entries that expired since the last run so the file stays small
+            with conn:
+                conn.execute(
+                    "DELETE FROM search_cache WHERE created <= ?",
+                    (time.time() - self.ttl,),
+                )
+            self._conn = conn
+        return self._conn
+
+    def get(self, query: str) -> Optional[Any]:
+        """Return the cached results for a query, or None if missing or stale."""
+        try:
+            with self._lock:
+                row = (
+                    self._connect()
+                    .execute(
+                        "SELECT results FROM search_cache"
+                        " WHERE query = ? AND created > ?",
+                        (query, time.time() - self.ttl),
+                    )
+                    .fetchone()
+                )
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.warning("Search cache read failed: %s", e)
+            return None
+
+    def set(self, query: str, results: Any) -> None:
+        """Store the results for a query."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?)",
+                        (query, time.time(), json.dumps(results)),
+                    )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Search cache write failed: %s", e)
@@ -1,6 +1,10 @@
+import asyncio
+import json
 import logging
+import os
+import re
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 from mcp.server.fastmcp import FastMCP
 
@@ -13,9 +17,33 @@ logger = logging.getLogger(__name__)
 mcp = FastMCP("YouTubeMusic")
 browser_auth_manager = BrowserAuthManager()
 
+# Where the setup tools read headers from and write browser.json to
+CONFIG_DIR = Path.home() / ".config" / "ytmusic-mcp"
+BROWSER_JSON = CONFIG_DIR / "browser.json"
+HEADERS_FILE = CONFIG_DIR / "headers.txt"
+
 # Version for tracking updates
 VERSION = "1.3.0"
 
+# Returned by tools that need browser.json before it has been set up
+_NOT_CONNECTED = "YouTube Music not connected. Please run setup_youtube_music first."
+
+# Steps returned by get_setup_instructions
+_SETUP_INSTRUCTIONS = """
+To set up browser authentication (no API quotas!):
+
+1. Open Chrome and go to https://music.youtube.com
+2. Make sure you're logged in to your Google account
+3. Press F12 for Developer Tools → click the "Network" tab
+4. In YouTube Music, click "Library" or "Home" to generate requests
+5. Find a request named "browse" (Status 200)
+6. Right-click on it → "Copy as fetch (Node.js)"
+7. Save the copied text to: ~/.config/ytmusic-mcp/headers.txt
+8. Run setup_youtube_music_from_file
+
+The tool will automatically extract just the headers it needs!
+"""
+
 
 @mcp.tool()
 def version() -> Dict[str, Any]:
@@ -38,28 +66,12 @@ def get_setup_instructions() -> Dict[str, Any]:
     """
 
     # Check if already configured
-    config_path = Path.home() / ".config" / "ytmusic-mcp" / "browser.json"
     is_configured = browser_auth_manager.is_authenticated()
 
-    instructions = """
-To set up browser authentication (no API quotas!):
-
-1. Open Chrome and go to https://music.youtube.com
-2. Make sure you're logged in to your Google account
-3. Press F12 for Developer Tools → click the "Network" tab
-4. In YouTube Music, click "Library" or "Home" to generate requests
-5. Find a request named "browse" (Status 200)
-6. Right-click on it → "Copy as fetch (Node.js)"
-7. Save the copied text to: ~/.config/ytmusic-mcp/headers.txt
-8. Run setup_youtube_music_from_file
-
-The tool will automatically extract just the headers it needs!
-"""
-
     return {
         "configured": is_configured,
-        "config_path": str(config_path),
-        "instructions": instructions,
+        "config_path": str(BROWSER_JSON),
+        "instructions": _SETUP_INSTRUCTIONS,
     }
 
 
@@ -73,12 +85,11 @@ def setup_youtube_music_from_file() -> Dict[str, Any]:
     Returns:
         Setup status
     """
-    import sys
 
-    headers_file = Path.home() / ".config" / "ytmusic-mcp" / "headers.txt"
+    headers_file = HEADERS_FILE
 
     if not headers_file.exists():
-        headers_file.parent.mkdir(parents=True, exist_ok=True)
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
         return {
             "success": False,
             "error": f"Please save your browser headers to {headers_file} first",
@@ -87,93 +98,116 @@ def setup_youtube_music_from_file() -> Dict[str, Any]:
 
     try:
         headers_raw = headers_file.read_text()
-        print(
-            f"[v{VERSION}] Read {len(headers_raw)} chars from headers.txt",
-            file=sys.stderr,
-        )
+        logger.debug("[v%s] Read %d chars from headers.txt", VERSION, len(headers_raw))
 
-        # Process the headers using the same logic
-        result = setup_youtube_music(headers_raw)
+        result = _save_browser_json(_parse_fetch_headers(headers_raw))
 
         # Delete the headers file after successful setup for security
         if result.get("success"):
             headers_file.unlink()
-            print("Deleted headers.txt for security", file=sys.stderr)
+            logger.info("Deleted headers.txt for security")
 
         return result
     except Exception as e:
-        import traceback
-
-        traceback.print_exc(file=sys.stderr)
+        logger.error("Setup from headers.txt failed: %s", e)
+        logger.debug("Setup traceback", exc_info=True)
         return {"success": False, "error": str(e)}
 
 
+# Patterns for the header formats accepted by _parse_fetch_headers
+_FETCH_HEADERS_RE = re.compile(r'"headers"\s*:\s*(?=\{)')
+_CURL_HEADER_RE = re.compile(r"-H\s+'([^':]+): ([^']*)'")
+_CURL_COOKIE_RE = re.compile(r"-b\s+'([^']+)'")
+_QUOTED_HEADER_RE = re.compile(r'"?([^"]+)"?\s*:\s*"(.+)"$')
+
+
 def _parse_fetch_headers(raw_text: str) -> Dict[str, str]:
     """
     Parse headers from various formats:
+    - A JSON object of headers
     - Chrome's 'Copy as fetch (Node.js)'
     - cURL command
     - Raw header lines
     """
-    import json
-    import re
-    import sys
 
     headers_dict = {}
 
-    # Method 1: Try to extract headers from fetch() format
-    headers_match = re.search(
-        r'"headers"\s*:\s*\{([^}]+(?:\{[^}]*\}[^}]*)*)\}', raw_text, re.DOTALL
-    )
+    # Method 1: A bare JSON object, either the headers or fetch()'s options
+    if raw_text.lstrip().startswith("{"):
+        try:
+            headers_obj = json.loads(raw_text)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(headers_obj, dict):
+                headers_obj = headers_obj.get("headers", headers_obj)
+            # Anything but an object of headers falls through to the other formats
+            if isinstance(headers_obj, dict):
+                logger.debug("Parsed %d headers from JSON", len(headers_obj))
+                return headers_obj
+
+    # Method 2: Try to extract headers from fetch() format
+    headers_match = _FETCH_HEADERS_RE.search(raw_text)
 
     if headers_match:
-        headers_str = "{" + headers_match.group(1) + "}"
-        print("Detected fetch format, extracting headers...", file=sys.stderr)
+        logger.debug("Detected fetch format, extracting headers...")
 
         try:
-            headers_obj = json.loads(headers_str)
-            print(
-                f"Parsed {len(headers_obj)} headers from fetch format", file=sys.stderr
+            # Decode just the headers object; the rest of the fetch() call is ignored
+            headers_obj, _ = json.JSONDecoder().raw_decode(
+                raw_text, headers_match.end()
             )
+            logger.debug("Parsed %d headers from fetch format", len(headers_obj))
             return headers_obj
         except json.JSONDecodeError as e:
-            print(f"Failed to parse headers JSON: {e}", file=sys.stderr)
+            logger.warning("Failed to parse headers JSON: %s", e)
 
-    # Method 2: Try to parse cURL format
+    # Method 3: Try to parse cURL format
     if raw_text.strip().startswith("curl "):
-        print("Detected cURL format", file=sys.stderr)
+        logger.debug("Detected cURL format")
 
         # Extract -H headers
-        header_matches = re.findall(r"-H\s+'([^']+)'", raw_text)
-        for header in header_matches:
-            if ": " in header:
-                key, value = header.split(": ", 1)
-                headers_dict[key.strip()] = value.strip()
+        headers_dict = {
+            key.strip(): value.strip()
+            for key, value in _CURL_HEADER_RE.findall(raw_text)
+        }
 
         # Extract -b cookies (cURL's cookie flag)
-        cookie_match = re.search(r"-b\s+'([^']+)'", raw_text)
+        cookie_match = _CURL_COOKIE_RE.search(raw_text)
         if cookie_match:
             headers_dict["cookie"] = cookie_match.group(1)
 
-        print(f"Parsed {len(headers_dict)} headers from cURL format", file=sys.stderr)
+        logger.debug("Parsed %d headers from cURL format", len(headers_dict))
         return headers_dict
 
-    # Method 3: Fallback to raw header lines
-    print("Parsing as raw header lines", file=sys.stderr)
-    for line in raw_text.split("\n"):
-        line = line.strip().strip(",").strip('"')
+    # Method 4: Fallback to raw header lines
+    logger.debug("Parsing as raw header lines")
+    for line in raw_text.splitlines():
+        line = line.strip(' \t\r\n,"')
         if ": " in line and not line.startswith("//"):
             if line.startswith('"') or "': '" in line:
-                match = re.match(r'"?([^"]+)"?\s*:\s*"(.+)"$', line)
+                match = _QUOTED_HEADER_RE.match(line)
                 if match:
                     headers_dict[match.group(1)] = match.group(2)
             else:
-                key, value = line.split(": ", 1)
+                key, _, value = line.partition(": ")
                 headers_dict[key.strip()] = value.strip()
 
     return headers_dict
 
 
+# Headers ytmusicapi needs, with the values to use when the browser omitted them
+_HEADER_DEFAULTS = {
+    "Accept": "*/*",
+    "Content-Type": "application/json",
+    "X-Goog-AuthUser": "0",
+    "x-origin": "https://music.youtube.com",
+}
+
+# Headers copied through only when present
+_PASSTHROUGH_HEADERS = ("Cookie", "Authorization")
+
+
 def _normalize_headers(headers_dict: Dict[str, str]) -> Dict[str, str]:
     """
     Extract and normalize only the required headers for ytmusicapi.
@@ -184,23 +218,60 @@ def _normalize_headers(headers_dict: Dict[str, str]) -> Dict[str, str]:
     lower_headers = {k.lower(): v for k, v in headers_dict.items()}
 
     result = {
-        "Accept": lower_headers.get("accept", "*/*"),
-        "Content-Type": lower_headers.get("content-type", "application/json"),
-        "X-Goog-AuthUser": lower_headers.get("x-goog-authuser", "0"),
-        "x-origin": lower_headers.get("x-origin", "https://music.youtube.com"),
+        name: lower_headers.get(name.lower(), default)
+        for name, default in _HEADER_DEFAULTS.items()
     }
 
-    # Cookie is required
-    if "cookie" in lower_headers:
-        result["Cookie"] = lower_headers["cookie"]
-
-    # Authorization is optional but include if present
-    if "authorization" in lower_headers:
-        result["Authorization"] = lower_headers["authorization"]
+    # Cookie is required, Authorization is optional; include either if present
+    for name in _PASSTHROUGH_HEADERS:
+        value = lower_headers.get(name.lower())
+        if value is not None:
+            result[name] = value
 
     return result
 
 
+def _atomic_write_text(path: Path, text: str) -> None:
+    """Write a file so readers never see it half-written."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
+
+
+def _save_browser_json(headers_dict: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Normalize parsed headers and save them as browser.json.
+
+    Returns:
+        Setup status
+    """
+    # Normalize to just the required headers with correct casing
+    browser_json = _normalize_headers(headers_dict)
+    logger.debug("Normalized to %d headers", len(browser_json))
+
+    # Check for required Cookie
+    if "Cookie" not in browser_json:
+        return {
+            "success": False,
+            "error": "No Cookie header found. Make sure you copied from an authenticated request.",
+        }
+
+    # Check for required cookie values
+    if "__Secure-3PAPISID" not in browser_json["Cookie"]:
+        logger.warning("Missing __Secure-3PAPISID cookie")
+
+    # Save to user config directory
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    _atomic_write_text(BROWSER_JSON, json.dumps(browser_json, indent=2))
+    logger.info("Saved browser.json to %s", BROWSER_JSON)
+
+    return {
+        "success": True,
+        "config_path": str(BROWSER_JSON),
+        "message": "YouTube Music connected successfully! You can now create playlists.",
+    }
+
+
 @mcp.tool()
 def setup_youtube_music(headers_raw: str) -> Dict[str, Any]:
     """
@@ -212,64 +283,23 @@ def setup_youtube_music(headers_raw: str) -> Dict[str, Any]:
     Returns:
         Setup status
     """
-    import json
-    import sys
-    import time
-
-    start_time = time.time()
-
     try:
-        print(f"[v{VERSION}] Starting setup_youtube_music", file=sys.stderr)
-        print(f"Input length: {len(headers_raw)} chars", file=sys.stderr)
+        logger.debug("[v%s] Starting setup_youtube_music", VERSION)
+        logger.debug("Input length: %d chars", len(headers_raw))
 
         # Parse the headers (handles fetch format, JSON, or raw headers)
         headers_dict = _parse_fetch_headers(headers_raw)
-        print(f"Parsed {len(headers_dict)} raw headers", file=sys.stderr)
-
-        # Normalize to just the required headers with correct casing
-        browser_json = _normalize_headers(headers_dict)
-        print(f"Normalized to {len(browser_json)} headers", file=sys.stderr)
-
-        # Check for required Cookie
-        if "Cookie" not in browser_json:
-            return {
-                "success": False,
-                "error": "No Cookie header found. Make sure you copied from an authenticated request.",
-            }
-
-        # Check for required cookie values
-        cookie = browser_json.get("Cookie", "")
-        if "__Secure-3PAPISID" not in cookie:
-            print("Warning: Missing __Secure-3PAPISID cookie", file=sys.stderr)
-
-        # Save to user config directory
-        config_dir = Path.home() / ".config" / "ytmusic-mcp"
-        config_dir.mkdir(parents=True, exist_ok=True)
-        config_path = config_dir / "browser.json"
-        print(f"Saving to {config_path}", file=sys.stderr)
-
-        with open(config_path, "w") as f:
-            json.dump(browser_json, f, indent=2)
-
-        elapsed = time.time() - start_time
-        print(f"Successfully saved browser.json in {elapsed:.2f}s", file=sys.stderr)
-
-        return {
-            "success": True,
-            "config_path": str(config_path),
-            "message": "YouTube Music connected successfully! You can now create playlists.",
-        }
+        logger.debug("Parsed %d raw headers", len(headers_dict))
 
+        return _save_browser_json(headers_dict)
     except Exception as e:
-        print(f"Error: {e}", file=sys.stderr)
-        import traceback
-
-        traceback.print_exc(file=sys.stderr)
+        logger.error("Setup failed: %s", e)
+        logger.debug("Setup traceback", exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
-def test_connection() -> Dict[str, Any]:
+async def test_connection() -> Dict[str, Any]:
     """
     Test your YouTube Music connection.
 
@@ -277,16 +307,37 @@ def test_connection() -> Dict[str, Any]:
         Connection status
     """
     if not browser_auth_manager.is_authenticated():
-        return {
-            "valid": False,
-            "message": "YouTube Music not connected. Please run setup_youtube_music first.",
-        }
+        return {"valid": False, "message": _NOT_CONNECTED}
+
+    # validate_auth makes blocking HTTP requests; keep them off the event loop
+    return await asyncio.to_thread(browser_auth_manager.validate_auth)
+
+
+async def _run_playlist_manager(
+    action: str, method: Callable[..., Dict[str, Any]], *args: Any
+) -> Dict[str, Any]:
+    """
+    Call a BrowserPlaylistManager method for a tool.
+
+    Checks the connection first, gets the manager and runs the blocking call
+    off the event loop, and reports any failure as an error result.
+    """
+    try:
+        if not browser_auth_manager.is_authenticated():
+            return {"error": _NOT_CONNECTED}
 
-    return browser_auth_manager.validate_auth()
+        # Building the client imports ytmusicapi and reads browser.json, so look
+        # the manager up in the worker thread too
+        return await asyncio.to_thread(
+            lambda: method(browser_auth_manager.get_playlist_manager(), *args)
+        )
+    except Exception as e:
+        logger.error("Error %s with browser auth: %s", action, e)
+        return {"error": str(e)}
 
 
 @mcp.tool()
-def search_songs(queries: List[str]) -> Dict[str, Any]:
+async def search_songs(queries: List[str]) -> Dict[str, Any]:
     """
     Search for songs on YouTube Music.
 
@@ -296,22 +347,15 @@ def search_songs(queries: List[str]) -> Dict[str, Any]:
     Returns:
         Search results for each query
     """
-    try:
-        if not browser_auth_manager.is_authenticated():
-            return {
-                "error": "YouTube Music not connected. Please run setup_youtube_music first."
-            }
-
-        ytmusic = browser_auth_manager.get_ytmusic()
-        manager = BrowserPlaylistManager(ytmusic)
-        return manager.search_tracks_detailed(queries)
-    except Exception as e:
-        logger.error(f"Error searching with browser auth: {e}")
-        return {"error": str(e)}
+    return await _run_playlist_manager(
+        "searching", BrowserPlaylistManager.search_tracks_detailed, queries
+    )
 
 
 @mcp.tool()
-def create_playlist(title: str, description: str, tracks: List[str]) -> Dict[str, Any]:
+async def create_playlist(
+    title: str, description: str, tracks: List[str]
+) -> Dict[str, Any]:
     """
     Create a YouTube Music playlist.
 
@@ -323,18 +367,13 @@ def create_playlist(title: str, description: str, tracks: List[str]) -> Dict[str
     Returns:
         Playlist creation results
     """
-    try:
-        if not browser_auth_manager.is_authenticated():
-            return {
-                "error": "YouTube Music not connected. Please run setup_youtube_music first."
-            }
-
-        ytmusic = browser_auth_manager.get_ytmusic()
-        manager = BrowserPlaylistManager(ytmusic)
-        return manager.search_and_create_playlist(title, description, tracks)
-    except Exception as e:
-        logger.error(f"Error creating playlist with browser auth: {e}")
-        return {"error": str(e)}
+    return await _run_playlist_manager(
+        "creating playlist",
+        BrowserPlaylistManager.search_and_create_playlist,
+        title,
+        description,
+        tracks,
+    )
 
 
 def main():
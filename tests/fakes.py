@@ -0,0 +1,51 @@
+"""
+Test doubles shared by the offline tests.
+"""
+
+import threading
+import time
+
+
+class FakeYTMusic:
+    """Minimal stand-in for ytmusicapi.YTMusic."""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.searches = []
+        self.added = []
+        self.lock = threading.Lock()
+
+    def search(self, query, filter=None, limit=None):
+        time.sleep(self.delays.get(query, 0))
+        with self.lock:
+            self.searches.append(query)
+        if query == "nothing":
+            return []
+        if query == "boom":
+            raise RuntimeError("search failed")
+        return [
+            {
+                "title": query,
+                "videoId": f"id-{query}",
+                "artists": [{"name": "Artist"}],
+                "album": {"name": "Album"},
+                "duration": "3:00",
+                "thumbnails": [{"url": "small.jpg"}, {"url": "large.jpg"}],
+            }
+        ]
+
+    def get_library_playlists(self, limit=None):
+        with self.lock:
+            self.searches.append("library")
+        return []
+
+    def create_playlist(self, title, description, privacy_status="PRIVATE"):
+        return "PL123"
+
+    def add_playlist_items(self, playlist_id, video_ids):
+        if "id-reject" in video_ids:
+            raise RuntimeError("add failed")
+        if "id-refuse" in video_ids:
+            return {"status": "STATUS_FAILED"}
+        self.added.append((playlist_id, list(video_ids)))
+        return {"status": "STATUS_SUCCEEDED"}
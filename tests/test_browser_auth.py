@@ -0,0 +1,288 @@
+"""
+Test BrowserPlaylistManager against a fake YTMusic client.
+These tests run offline and never reach YouTube Music.
+"""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+
+from tests.fakes import FakeYTMusic
+from ytmusic_mcp import browser_auth
+from ytmusic_mcp.browser_auth import BrowserAuthManager, BrowserPlaylistManager
+
+
+@pytest.fixture
+def auth_manager(tmp_path, monkeypatch):
+    """A BrowserAuthManager on a temporary browser.json that builds FakeYTMusic."""
+    monkeypatch.setattr(
+        browser_auth,
+        "_ytmusic_class",
+        lambda: lambda path, requests_session=None: FakeYTMusic(),
+    )
+    browser_json = tmp_path / "browser.json"
+    browser_json.write_text("{}")
+    return BrowserAuthManager(str(browser_json))
+
+
+def touch(path):
+    """Bump a file's modification time, as rewriting it would."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_create_playlist_preserves_query_order():
+    """Concurrent searches still report results in query order."""
+    # The first query finishes last
+    ytmusic = FakeYTMusic(delays={"first": 0.05})
+    manager = BrowserPlaylistManager(ytmusic)
+
+    result = manager.search_and_create_playlist(
+        "Title", "Description", ["first", "nothing", "boom", "last"]
+    )
+
+    assert [d["query"] for d in result["details"]] == [
+        "first",
+        "nothing",
+        "boom",
+        "last",
+    ]
+    assert [d["found"] for d in result["details"]] == [True, False, False, True]
+    assert result["details"][1]["reason"] == "No search results"
+    assert result["details"][2]["error"] == "search failed"
+    assert ytmusic.added == [("PL123", ["id-first", "id-last"])]
+    assert result["tracks_added"] == 2
+    assert result["tracks_total"] == 4
+    assert result["failed_batches"] == []
+
+
+def test_create_playlist_adds_tracks_in_batches(monkeypatch):
+    """Tracks are added in ordered batches and failed batches are reported."""
+    monkeypatch.setattr(browser_auth, "ADD_BATCH_SIZE", 2)
+    ytmusic = FakeYTMusic()
+    manager = BrowserPlaylistManager(ytmusic)
+
+    result = manager.search_and_create_playlist(
+        "Title", "Description", ["a", "b", "c", "reject", "e"]
+    )
+
+    assert ytmusic.added == [("PL123", ["id-a", "id-b"]), ("PL123", ["id-e"])]
+    assert result["tracks_added"] == 3
+    assert result["failed_batches"] == [
+        {"videoIds": ["id-c", "id-reject"], "error": "add failed"}
+    ]
+    assert [d["added"] for d in result["details"]] == [True, True, False, False, True]
+
+
+def test_create_playlist_reports_rejected_batches(monkeypatch):
+    """A batch YouTube Music answers without success is not counted as added."""
+    monkeypatch.setattr(browser_auth, "ADD_BATCH_SIZE", 2)
+    ytmusic = FakeYTMusic()
+    manager = BrowserPlaylistManager(ytmusic)
+
+    result = manager.search_and_create_playlist(
+        "Title", "Description", ["a", "b", "refuse", "d"]
+    )
+
+    assert ytmusic.added == [("PL123", ["id-a", "id-b"])]
+    assert result["tracks_added"] == 2
+    assert result["failed_batches"] == [
+        {
+            "videoIds": ["id-refuse", "id-d"],
+            "error": "Add failed with status STATUS_FAILED",
+        }
+    ]
+
+
+def test_get_ytmusic_reloads_when_browser_json_changes(auth_manager):
+    """The cached client is reused until browser.json is rewritten."""
+    first = auth_manager.get_ytmusic()
+    assert auth_manager.get_ytmusic() is first
+
+    touch(auth_manager.browser_json_path)
+    assert auth_manager.get_ytmusic() is not first
+
+
+def test_search_tracks_detailed_preserves_query_order():
+    """Concurrent detailed searches keep one entry per query, in order."""
+    ytmusic = FakeYTMusic(delays={"first": 0.05})
+    manager = BrowserPlaylistManager(ytmusic)
+
+    results = manager.search_tracks_detailed(["first", "nothing", "boom"])
+
+    assert list(results) == ["first", "nothing", "boom"]
+    assert results["first"][0]["videoId"] == "id-first"
+    assert results["first"][0]["thumbnail"] == "large.jpg"
+    assert results["nothing"] == []
+    assert results["boom"] == {"error": "search failed"}
+
+
+def test_select_best_match_prefers_original_recording():
+    """Remixes and live versions lose to the original; ties keep search order."""
+    manager = BrowserPlaylistManager(FakeYTMusic())
+    results = [
+        {"title": "Song (Remix)", "videoId": "remix"},
+        {"title": "Song (Live)", "videoId": "live"},
+        {"title": "Song", "videoId": "original"},
+        {"title": "Song", "videoId": "duplicate"},
+    ]
+
+    assert manager._select_best_match(results, "song")["videoId"] == "original"
+
+
+def test_repeated_searches_are_cached(monkeypatch):
+    """A manager searches each query once and evicts the oldest entries."""
+    monkeypatch.setattr(browser_auth, "SEARCH_CACHE_SIZE", 2)
+    ytmusic = FakeYTMusic()
+    manager = BrowserPlaylistManager(ytmusic)
+
+    manager.search_tracks_detailed(["a", "b"])
+    manager.search_tracks_detailed(["a", "c"])
+    manager.search_tracks_detailed(["b"])
+
+    assert sorted(ytmusic.searches) == ["a", "b", "b", "c"]
+
+
+def test_cached_searches_expire(monkeypatch):
+    """Searches older than SEARCH_CACHE_TTL go back to the network."""
+    monkeypatch.setattr(browser_auth, "SEARCH_CACHE_TTL", 0)
+    ytmusic = FakeYTMusic()
+    manager = BrowserPlaylistManager(ytmusic)
+
+    manager.search_tracks_detailed(["a"])
+    manager.search_tracks_detailed(["a"])
+
+    assert ytmusic.searches == ["a", "a"]
+
+
+def test_create_playlist_searches_duplicate_queries_once():
+    """Repeated queries, ignoring case and spacing, share one search."""
+    ytmusic = FakeYTMusic()
+    manager = BrowserPlaylistManager(ytmusic)
+
+    result = manager.search_and_create_playlist(
+        "Title", "Description", ["a", "b", "a", " A "]
+    )
+
+    assert sorted(ytmusic.searches) == ["a", "b"]
+    assert [d["query"] for d in result["details"]] == ["a", "b", "a", " A "]
+    assert result["details"][3]["videoId"] == "id-a"
+    assert ytmusic.added == [("PL123", ["id-a", "id-b"])]
+
+
+def test_title_flags_match_whole_words():
+    """Marker words only count as whole words, not inside other words."""
+    assert browser_auth._title_flags("Song (Live at Wembley) - Remix") == {
+        "live",
+        "remix",
+    }
+    assert browser_auth._title_flags("Alive (Credits Edited)") == set()
+
+
+def test_validate_auth_reuses_recent_success(auth_manager):
+    """Validation probes once until browser.json changes or the TTL expires."""
+    assert auth_manager.validate_auth()["valid"] is True
+    assert auth_manager.validate_auth()["valid"] is True
+    assert sorted(auth_manager.get_ytmusic().searches) == ["library", "test"]
+
+    # Rewriting browser.json forces a fresh probe
+    touch(auth_manager.browser_json_path)
+    auth_manager.validate_auth()
+    assert sorted(auth_manager.get_ytmusic().searches) == ["library", "test"]
+
+
+def test_validate_auth_keys_success_on_the_probed_file(auth_manager):
+    """A success is not reused for a browser.json rewritten during the probe."""
+    probed = auth_manager.get_ytmusic()
+
+    def rewrite_during_probe(limit=None):
+        # Another tool call picks up the rewritten file while this probe runs
+        touch(auth_manager.browser_json_path)
+        auth_manager.get_ytmusic()
+        return []
+
+    probed.get_library_playlists = rewrite_during_probe
+
+    assert auth_manager.validate_auth()["valid"] is True
+
+    # The new file's client must be probed itself
+    auth_manager.validate_auth()
+    assert sorted(auth_manager.get_ytmusic().searches) == ["library", "test"]
+
+
+def test_playlist_manager_is_shared_until_browser_json_changes(auth_manager):
+    """Tool calls share one manager (and search cache) per YTMusic client."""
+    first = auth_manager.get_playlist_manager()
+    assert auth_manager.get_playlist_manager() is first
+
+    touch(auth_manager.browser_json_path)
+    assert auth_manager.get_playlist_manager() is not first
+
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    """Answers 429 with a long Retry-After until the server's third request."""
+
+    def do_POST(self):
+        self.server.requests_seen += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.requests_seen < 3:
+            self.send_response(429)
+            self.send_header("Retry-After", "3600")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_rate_limited_posts_are_retried_with_capped_wait(monkeypatch):
+    """A 429 is retried, waiting no longer than RATE_LIMIT_MAX_WAIT."""
+    monkeypatch.setattr(browser_auth, "RATE_LIMIT_MAX_WAIT", 0.1)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RateLimitedHandler)
+    server.requests_seen = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    session = browser_auth._create_session()
+    session.mount("http://", HTTPAdapter(max_retries=browser_auth._RATE_LIMIT_RETRY))
+
+    try:
+        start = time.monotonic()
+        response = session.post(f"http://127.0.0.1:{server.server_port}/", json={})
+        elapsed = time.monotonic() - start
+    finally:
+        session.close()
+        server.shutdown()
+        server.server_close()
+
+    assert response.status_code == 200
+    assert server.requests_seen == 3
+    assert elapsed < 5
+
+
+def test_rate_limit_retry_backoff_and_limits():
+    """Retry-After is capped, backoff doubles and read errors are not retried."""
+    retry = browser_auth._RATE_LIMIT_RETRY
+    assert retry.is_retry("POST", 429)
+    assert not retry.is_retry("POST", 500)
+    response = HTTPResponse(status=429, headers={"Retry-After": "3600"})
+    assert retry.get_retry_after(response) == browser_auth.RATE_LIMIT_MAX_WAIT
+
+    # Without Retry-After the wait is backoff_factor * 2**(n - 1) plus jitter
+    for _ in range(3):
+        retry = retry.increment(method="POST", url="/")
+    assert 4 <= retry.get_backoff_time() <= 4.5
+    with pytest.raises(MaxRetryError):
+        retry.increment(method="POST", url="/")
+
+    # A read error on a POST may have been applied, so it is never retried
+    with pytest.raises(MaxRetryError):
+        browser_auth._RATE_LIMIT_RETRY.increment(
+            method="POST", url="/", error=ReadTimeoutError(None, "/", "timed out")
+        )
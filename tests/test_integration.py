@@ -1,9 +1,6 @@
 """Integration tests for the MCP server with real API calls."""
 
 import pytest
-import asyncio
-import json
-from pathlib import Path
 from ytmusic_mcp.server import mcp
 
 
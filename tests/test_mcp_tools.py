@@ -3,10 +3,49 @@ Test MCP tools directly, simulating user interactions.
 These are "live" tests that actually call the tools.
 """
 
+import asyncio
 import json
 import pytest
-from pathlib import Path
-from ytmusic_mcp.server import mcp
+from ytmusic_mcp import server
+from ytmusic_mcp.server import BROWSER_JSON, mcp
+
+# Minimal headers that should work
+MINIMAL_HEADERS = """accept: */*
+authorization: SAPISIDHASH test_token
+cookie: __Secure-3PAPISID=test_value; other=cookies
+x-goog-authuser: 0
+content-type: application/json"""
+
+# Headers without a cookie, which setup must reject
+NO_COOKIE_HEADERS = """accept: */*
+content-type: application/json"""
+
+# A fetch() call whose values contain braces
+FETCH_HEADERS = """fetch("https://music.youtube.com/youtubei/v1/browse", {
+  "headers": {
+    "accept": "*/*",
+    "cookie": "__Secure-3PAPISID=fetch_test; pref={\\"f6\\":\\"400\\"}",
+    "x-goog-authuser": "0"
+  },
+  "body": "{\\"context\\":{}}",
+  "method": "POST"
+});"""
+
+# Headers saved to headers.txt for file-based setup
+FILE_HEADERS = """accept: */*
+authorization: SAPISIDHASH test_file_token
+cookie: __Secure-3PAPISID=file_test; session=active
+x-goog-authuser: 0
+content-type: application/json"""
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    """Point the setup tools at a temporary config directory."""
+    monkeypatch.setattr(server, "CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(server, "BROWSER_JSON", tmp_path / "browser.json")
+    monkeypatch.setattr(server, "HEADERS_FILE", tmp_path / "headers.txt")
+    return tmp_path
 
 
 @pytest.mark.asyncio
@@ -43,40 +82,28 @@ async def test_get_setup_instructions():
 
 
 @pytest.mark.asyncio
-async def test_setup_with_minimal_headers():
+async def test_setup_with_minimal_headers(config_dir):
     """Test setup with minimal valid headers."""
-    # Minimal headers that should work
-    headers_raw = """accept: */*
-authorization: SAPISIDHASH test_token
-cookie: __Secure-3PAPISID=test_value; other=cookies
-x-goog-authuser: 0
-content-type: application/json"""
-    
-    result = await mcp.call_tool("setup_youtube_music", {"headers_raw": headers_raw})
+    result = await mcp.call_tool(
+        "setup_youtube_music", {"headers_raw": MINIMAL_HEADERS}
+    )
     
     content_list, metadata = result
     actual_result = metadata.get("result", {})
     
     assert "success" in actual_result
     assert actual_result["success"] is True
-    assert "config_path" in actual_result
+    assert actual_result["config_path"] == str(config_dir / "browser.json")
     
     print(f"Setup result: {actual_result.get('message')}")
-    
-    # Clean up test file
-    config_path = Path(actual_result["config_path"])
-    if config_path.exists():
-        config_path.unlink()
-        print(f"Cleaned up test config: {config_path}")
 
 
 @pytest.mark.asyncio
 async def test_setup_with_invalid_headers():
     """Test setup with invalid headers (missing cookie)."""
-    headers_raw = """accept: */*
-content-type: application/json"""
-    
-    result = await mcp.call_tool("setup_youtube_music", {"headers_raw": headers_raw})
+    result = await mcp.call_tool(
+        "setup_youtube_music", {"headers_raw": NO_COOKIE_HEADERS}
+    )
     
     content_list, metadata = result
     actual_result = metadata.get("result", {})
@@ -90,13 +117,55 @@ content-type: application/json"""
 
 
 @pytest.mark.asyncio
-async def test_setup_from_file_no_file():
+async def test_setup_with_fetch_headers(config_dir):
+    """Test setup with a fetch() call whose values contain braces."""
+    result = await mcp.call_tool("setup_youtube_music", {"headers_raw": FETCH_HEADERS})
+
+    content_list, metadata = result
+    actual_result = metadata.get("result", {})
+
+    assert actual_result["success"] is True
+    assert actual_result["config_path"] == str(config_dir / "browser.json")
+
+    saved = json.loads((config_dir / "browser.json").read_text())
+    assert saved["Cookie"] == '__Secure-3PAPISID=fetch_test; pref={"f6":"400"}'
+
+
+@pytest.mark.asyncio
+async def test_setup_with_json_headers(config_dir):
+    """Test setup with a plain JSON object of headers."""
+    headers_raw = json.dumps({"Cookie": "__Secure-3PAPISID=json_test", "Accept": "*/*"})
+
+    result = await mcp.call_tool("setup_youtube_music", {"headers_raw": headers_raw})
+
+    content_list, metadata = result
+    actual_result = metadata.get("result", {})
+
+    assert actual_result["success"] is True
+
+    saved = json.loads((config_dir / "browser.json").read_text())
+    assert saved["Cookie"] == "__Secure-3PAPISID=json_test"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("headers", [None, "x", ["cookie: a=b"]])
+async def test_setup_with_non_object_json_headers(config_dir, headers):
+    """A JSON "headers" value that isn't an object is reported as missing headers."""
+    headers_raw = json.dumps({"headers": headers})
+
+    result = await mcp.call_tool("setup_youtube_music", {"headers_raw": headers_raw})
+
+    content_list, metadata = result
+    actual_result = metadata.get("result", {})
+
+    assert actual_result["success"] is False
+    assert "Cookie" in actual_result["error"]
+    assert not (config_dir / "browser.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_setup_from_file_no_file(config_dir):
     """Test file-based setup when file doesn't exist."""
-    # Make sure file doesn't exist
-    headers_file = Path.home() / ".config" / "ytmusic-mcp" / "headers.txt"
-    if headers_file.exists():
-        headers_file.unlink()
-    
     result = await mcp.call_tool("setup_youtube_music_from_file", {})
     
     content_list, metadata = result
@@ -111,51 +180,35 @@ async def test_setup_from_file_no_file():
 
 
 @pytest.mark.asyncio
-async def test_setup_from_file_with_headers():
+async def test_setup_from_file_with_headers(config_dir):
     """Test file-based setup with valid headers file."""
     # Create headers file
-    headers_file = Path.home() / ".config" / "ytmusic-mcp" / "headers.txt"
-    headers_file.parent.mkdir(parents=True, exist_ok=True)
+    headers_file = config_dir / "headers.txt"
+    headers_file.write_text(FILE_HEADERS)
     
-    headers_content = """accept: */*
-authorization: SAPISIDHASH test_file_token
-cookie: __Secure-3PAPISID=file_test; session=active
-x-goog-authuser: 0
-content-type: application/json"""
+    result = await mcp.call_tool("setup_youtube_music_from_file", {})
     
-    headers_file.write_text(headers_content)
+    content_list, metadata = result
+    actual_result = metadata.get("result", {})
     
-    try:
-        result = await mcp.call_tool("setup_youtube_music_from_file", {})
-        
-        content_list, metadata = result
-        actual_result = metadata.get("result", {})
-        
-        assert "success" in actual_result
-        assert actual_result["success"] is True
-        
-        # File should be deleted after successful setup
-        assert not headers_file.exists(), "Headers file should be deleted after successful setup"
-        
-        print(f"File-based setup: {actual_result.get('message')}")
-        
-        # Clean up config
-        config_path = Path(actual_result["config_path"])
-        if config_path.exists():
-            config_path.unlink()
-            
-    finally:
-        # Clean up in case of failure
-        if headers_file.exists():
-            headers_file.unlink()
+    assert "success" in actual_result
+    assert actual_result["success"] is True
+    assert (config_dir / "browser.json").exists()
+    
+    # File should be deleted after successful setup
+    assert not headers_file.exists(), "Headers file should be deleted after setup"
+    
+    print(f"File-based setup: {actual_result.get('message')}")
 
 
 @pytest.mark.asyncio
 async def test_test_connection_without_auth():
     """Test connection check without authentication."""
     # Ensure no auth file exists
-    config_path = Path.home() / ".config" / "ytmusic-mcp" / "browser.json"
-    if config_path.exists():
+    config_path = BROWSER_JSON
+    has_auth = config_path.exists()
+    
+    if has_auth:
         config_path.rename(config_path.with_suffix(".json.backup"))
     
     try:
@@ -171,10 +224,9 @@ async def test_test_connection_without_auth():
         print(f"Connection test: {actual_result['message']}")
         
     finally:
-        # Restore backup if it exists
-        backup = config_path.with_suffix(".json.backup")
-        if backup.exists():
-            backup.rename(config_path)
+        # Restore backup if there was one
+        if has_auth:
+            config_path.with_suffix(".json.backup").rename(config_path)
 
 
 @pytest.mark.asyncio
@@ -185,7 +237,7 @@ async def test_test_connection_without_auth():
 async def test_search_songs_without_auth(query):
     """Test search without authentication - should fail gracefully."""
     # Ensure no auth
-    config_path = Path.home() / ".config" / "ytmusic-mcp" / "browser.json"
+    config_path = BROWSER_JSON
     has_auth = config_path.exists()
     
     if has_auth:
@@ -204,16 +256,15 @@ async def test_search_songs_without_auth(query):
         
     finally:
         # Restore auth
-        backup = config_path.with_suffix(".json.backup")
-        if backup.exists():
-            backup.rename(config_path)
+        if has_auth:
+            config_path.with_suffix(".json.backup").rename(config_path)
 
 
 @pytest.mark.asyncio
 async def test_create_playlist_without_auth():
     """Test playlist creation without authentication."""
     # Ensure no auth
-    config_path = Path.home() / ".config" / "ytmusic-mcp" / "browser.json"
+    config_path = BROWSER_JSON
     has_auth = config_path.exists()
     
     if has_auth:
@@ -236,9 +287,8 @@ async def test_create_playlist_without_auth():
         
     finally:
         # Restore auth
-        backup = config_path.with_suffix(".json.backup")
-        if backup.exists():
-            backup.rename(config_path)
+        if has_auth:
+            config_path.with_suffix(".json.backup").rename(config_path)
 
 
 # Live tests that require real authentication
@@ -270,21 +320,19 @@ async def test_full_flow_with_real_headers():
     assert setup_result["success"] is True
     print(f"Setup: {setup_result['message']}")
     
-    # Test connection
-    result = await mcp.call_tool("test_connection", {})
-    content_list, metadata = result
-    conn_result = metadata.get("result", {})
+    # Test connection and search for songs; neither depends on the other
+    (_, conn_metadata), (_, search_metadata) = await asyncio.gather(
+        mcp.call_tool("test_connection", {}),
+        mcp.call_tool("search_songs", {
+            "queries": ["Bohemian Rhapsody", "Hotel California"]
+        }),
+    )
+    conn_result = conn_metadata.get("result", {})
+    search_result = search_metadata.get("result", {})
     
     assert conn_result["valid"] is True
     print(f"Connection: {conn_result['message']}")
     
-    # Search for songs
-    result = await mcp.call_tool("search_songs", {
-        "queries": ["Bohemian Rhapsody", "Hotel California"]
-    })
-    content_list, metadata = result
-    search_result = metadata.get("result", {})
-    
     assert "results" in search_result
     assert len(search_result["results"]) == 2
     print(f"Found {len(search_result['results'])} songs")
@@ -0,0 +1,56 @@
+"""
+Test the on-disk search cache.
+"""
+
+import sqlite3
+
+from tests.fakes import FakeYTMusic
+from ytmusic_mcp.browser_auth import BrowserPlaylistManager
+from ytmusic_mcp.search_cache import SearchCache
+
+
+def test_search_cache_round_trip(tmp_path):
+    """Stored results come back until they are older than the TTL."""
+    cache = SearchCache(tmp_path / "search.db")
+    assert cache.get("song") is None
+
+    cache.set("song", [{"videoId": "abc"}])
+    assert cache.get("song") == [{"videoId": "abc"}]
+
+    # Entries are judged stale when read, against the reader's TTL
+    assert SearchCache(tmp_path / "search.db", ttl=-1).get("song") is None
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    """A corrupt row is treated as missing, and the next set replaces it."""
+    cache = SearchCache(tmp_path / "search.db")
+    cache.set("song", [])
+    with sqlite3.connect(tmp_path / "search.db") as conn:
+        conn.execute("UPDATE search_cache SET results = 'not json'")
+
+    assert cache.get("song") is None
+
+    cache.set("song", [{"videoId": "abc"}])
+    assert cache.get("song") == [{"videoId": "abc"}]
+
+
+def test_expired_entries_are_deleted_on_open(tmp_path):
+    """Opening the cache purges rows older than the TTL, so the file stays small."""
+    SearchCache(tmp_path / "search.db").set("song", [{"videoId": "abc"}])
+
+    SearchCache(tmp_path / "search.db", ttl=-1).get("other")
+
+    with sqlite3.connect(tmp_path / "search.db") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM search_cache").fetchone() == (0,)
+
+
+def test_search_results_survive_a_new_manager(tmp_path):
+    """A fresh manager (e.g. after a restart) reads earlier searches from disk."""
+    cache = SearchCache(tmp_path / "search.db")
+    BrowserPlaylistManager(FakeYTMusic(), cache).search_tracks_detailed(["a"])
+
+    ytmusic = FakeYTMusic()
+    results = BrowserPlaylistManager(ytmusic, cache).search_tracks_detailed(["A"])
+
+    assert ytmusic.searches == []
+    assert results["A"][0]["videoId"] == "id-a"
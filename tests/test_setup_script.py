@@ -0,0 +1,42 @@
+"""
+Test cURL parsing in the standalone setup_youtube_music.py script.
+"""
+
+from setup_youtube_music import extract_cookies_and_headers
+
+
+def test_line_continuations_and_cookie_flag():
+    """Multi-line commands are joined and -b supplies the cookie."""
+    curl = (
+        "curl 'https://music.youtube.com/youtubei/v1/browse' \\\n"
+        "  -H 'accept: */*' \\\r\n"
+        "  -H 'X-Goog-AuthUser: 0' \\\n"
+        "  -b 'SID=abc; __Secure-3PAPISID=xyz'"
+    )
+
+    assert extract_cookies_and_headers(curl) == {
+        "accept": "*/*",
+        "x-goog-authuser": "0",
+        "cookie": "SID=abc; __Secure-3PAPISID=xyz",
+    }
+
+
+def test_long_options_with_equals():
+    """--header=... and --cookie=... carry their value in the same argument."""
+    curl = "curl https://x --header='accept: */*' --cookie='SID=abc'"
+
+    assert extract_cookies_and_headers(curl) == {"accept": "*/*", "cookie": "SID=abc"}
+
+
+def test_ansi_c_quoted_values():
+    """Chrome's $'...' quoting is decoded instead of breaking the parse."""
+    curl = (
+        "curl 'https://x' -b $'pref=f6\\u0021; note=it\\'s' "
+        "-H 'price: $' "
+        '--data-raw $\'{"q":"Don\\\'t"}\''
+    )
+
+    assert extract_cookies_and_headers(curl) == {
+        "cookie": "pref=f6!; note=it's",
+        "price": "$",
+    }